@@ -1,31 +1,77 @@
+import array
 import csv
 import math
 import os
 import random
-from collections import Counter, deque
+import sys
+from collections import Counter, defaultdict, deque
+
+
+# precomputed year -> decade string for every year the simulation can produce
+_DECADE_CACHE = {y: f"{(y // 10) * 10}s" for y in range(1900, 2200)}
 
 
 # e.g. 1983 -> "1980s"
 def decade_str(year):
-    return f"{(year // 10) * 10}s"
+    return _DECADE_CACHE.get(year) or f"{(year // 10) * 10}s"
+
+
+class AliasTable:
+    """Walker/Vose alias table for O(1) weighted sampling from a fixed distribution."""
+
+    def __init__(self, weights):
+        n = len(weights)
+        total = sum(weights)
+        # scale so the average bucket holds exactly 1.0
+        scaled = [w * n / total for w in weights]
+        self.prob = [0.0] * n
+        self.alias = list(range(n))
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            g = large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = g
+            scaled[g] -= 1.0 - scaled[s]
+            if scaled[g] < 1.0:
+                small.append(g)
+            else:
+                large.append(g)
+        # whatever is left is 1.0 up to float error
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def draw(self, rng):
+        # one uniform does both jobs: the integer part picks the bucket and
+        # the fractional part decides between it and its alias
+        prob = self.prob
+        n = len(prob)
+        u = rng.random() * n
+        i = int(u)
+        return i if u - i < prob[i] else self.alias[i]
 
 
 class Person:
+    __slots__ = ("pid", "first_name", "last_name", "gender", "year_born", "year_died",
+                 "is_descendant", "partner_id", "visited_unit",
+                 "full_name")
+
     def __init__(self, pid, first_name, last_name, gender, year_born, year_died, is_descendant):
         self.pid = pid
         self.first_name = first_name
         self.last_name = last_name
+        # names never change after creation, so build the display name once
+        self.full_name = f"{first_name} {last_name}"
         self.gender = gender
         self.year_born = year_born
         self.year_died = year_died
         self.is_descendant = is_descendant
 
         self.partner_id = None
-        self.children_ids = []
-
-    @property
-    def full_name(self):
-        return f"{self.first_name} {self.last_name}"
+        # set once this person's couple (or single self) has been expanded in the BFS
+        self.visited_unit = False
 
 
 class PersonFactory:
@@ -37,12 +83,18 @@ class PersonFactory:
 
         # decade -> (birth_rate, marriage_rate)
         self.birth_marriage = {}
-        # (decade, gender) -> (names_list, weights_list)
+        # year -> (birth_rate, marriage_rate), flattened from birth_marriage
+        self.birth_marriage_by_year = {}
+        # (decade, gender) -> (names_list, AliasTable)
         self.first_names = {}
         # year -> life expectancy float
         self.life_exp = {}
+        # cached bounds plus rounded life expectancy indexed by year - life_exp_min
+        self.life_exp_min = 0
+        self.life_exp_max = 0
+        self.life_exp_arr = []
         self.rank_probs = []
-        # decade -> (names_list, weights_list), normalized by rank probability
+        # decade -> (names_list, AliasTable), weighted by rank probability
         self.last_names_by_decade = {}
 
         self._next_id = 1
@@ -56,32 +108,62 @@ class PersonFactory:
 
     def _read_birth_marriage(self, path):
         with open(path, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                self.birth_marriage[row["decade"]] = (
-                    float(row["birth_rate"]),
-                    float(row["marriage_rate"])
-                )
+            reader = csv.reader(f)
+            header = next(reader)
+            di = header.index("decade")
+            bi = header.index("birth_rate")
+            mi = header.index("marriage_rate")
+            for row in filter(None, reader):
+                self.birth_marriage[row[di]] = (float(row[bi]), float(row[mi]))
+
+        # key rates directly by year so the BFS doesn't rebuild decade strings;
+        # each "1950s"-style decade covers its ten years
+        self.birth_marriage_by_year = {}
+        for decade, rates in self.birth_marriage.items():
+            start = int(decade.rstrip("s"))
+            for y in range(start, start + 10):
+                self.birth_marriage_by_year[y] = rates
+
+    def rates_for_year(self, year):
+        # fall back to the decade lookup so a missing decade fails with its name
+        return self.birth_marriage_by_year.get(year) or self.birth_marriage[decade_str(year)]
 
     def _read_first_names(self, path):
         # columns: decade, gender, name, frequency
         buckets = {}
         with open(path, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                key = (row["decade"], row["gender"].strip().lower())
+            reader = csv.reader(f)
+            header = next(reader)
+            di = header.index("decade")
+            gi = header.index("gender")
+            ni = header.index("name")
+            fi = header.index("frequency")
+            for row in filter(None, reader):
+                key = (row[di], row[gi].strip().lower())
                 if key not in buckets:
                     buckets[key] = ([], [])
-                buckets[key][0].append(row["name"])
-                buckets[key][1].append(float(row["frequency"]))
-        self.first_names = buckets
+                # intern so every Person with this name shares one string
+                buckets[key][0].append(sys.intern(row[ni]))
+                buckets[key][1].append(float(row[fi]))
+
+        # build alias tables once so each draw is constant time
+        for key, (names, weights) in buckets.items():
+            self.first_names[key] = (names, AliasTable(weights))
 
     def _read_life_expectancy(self, path):
         # columns: Year, Period life expectancy at birth
         with open(path, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                self.life_exp[int(row["Year"])] = float(row["Period life expectancy at birth"])
+            reader = csv.reader(f)
+            header = next(reader)
+            yi = header.index("Year")
+            li = header.index("Period life expectancy at birth")
+            for row in filter(None, reader):
+                self.life_exp[int(row[yi])] = float(row[li])
+
+        self.life_exp_min = min(self.life_exp)
+        self.life_exp_max = max(self.life_exp)
+        self.life_exp_arr = [int(round(self.life_exp[y]))
+                             for y in range(self.life_exp_min, self.life_exp_max + 1)]
 
     def _read_rank_probs(self, path):
         # single line of 30 comma-separated probabilities
@@ -103,30 +185,34 @@ class PersonFactory:
         # defensive parsing: handle files with or without a Decade column
         # if no decade column exists, pool all names under "1950s" as fallback
         with open(path, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            headers = reader.fieldnames or []
-            has_decade = any(h.lower() == "decade" for h in headers)
+            reader = csv.reader(f)
+            headers = [h.strip().lower() for h in next(reader, [])]
+            di = headers.index("decade") if "decade" in headers else None
+            ni = next((headers.index(h) for h in ("lastname", "last_name") if h in headers), None)
+            ri = headers.index("rank") if "rank" in headers else None
+            if ni is None or ri is None:
+                return
 
             for row in reader:
+                if len(row) <= max(ni, ri, di or 0):
+                    continue
                 decade = "1950s"
-                if has_decade:
-                    decade = row.get("Decade") or row.get("decade") or "1950s"
+                if di is not None:
+                    decade = row[di] or "1950s"
 
-                name = row.get("LastName") or row.get("last_name") or row.get("lastname")
-                rank_str = row.get("Rank") or row.get("rank")
+                name = row[ni]
+                rank_str = row[ri]
                 if not name or not rank_str:
                     continue
                 rank = int(rank_str)
                 if decade not in self.last_names_by_decade:
                     self.last_names_by_decade[decade] = ([], [])
-                self.last_names_by_decade[decade][0].append(name.strip())
+                self.last_names_by_decade[decade][0].append(sys.intern(name.strip()))
                 self.last_names_by_decade[decade][1].append(self.rank_probs[rank - 1])
 
-        # normalize weights per decade so they sum to 1
-        for decade in self.last_names_by_decade:
-            names, weights = self.last_names_by_decade[decade]
-            total = sum(weights)
-            self.last_names_by_decade[decade] = (names, [w / total for w in weights])
+        # build alias tables once so each draw is constant time
+        for decade, (names, weights) in self.last_names_by_decade.items():
+            self.last_names_by_decade[decade] = (names, AliasTable(weights))
 
     def _new_id(self):
         pid = self._next_id
@@ -138,22 +224,26 @@ class PersonFactory:
 
     def pick_first_name(self, year_born, gender):
         key = (decade_str(year_born), gender)
-        names, weights = self.first_names[key]
-        return self.rng.choices(names, weights=weights, k=1)[0]
+        names, table = self.first_names[key]
+        return names[table.draw(self.rng)]
 
     def pick_last_name(self, year_born=None):
         # use the decade matching year_born; clamp to 1950s if we don't have data
         decade = decade_str(year_born) if year_born is not None else "1950s"
         if decade not in self.last_names_by_decade:
             decade = "1950s"
-        names, weights = self.last_names_by_decade[decade]
-        return self.rng.choices(names, weights=weights, k=1)[0]
+        names, table = self.last_names_by_decade[decade]
+        return names[table.draw(self.rng)]
 
     def compute_year_died(self, year_born):
         # clamp year_born so we don't index outside the life expectancy table
-        clamped = max(min(year_born, max(self.life_exp)), min(self.life_exp))
-        le = self.life_exp[clamped]
-        age = int(round(le)) + self.rng.randint(-10, 10)
+        if year_born < self.life_exp_min:
+            y = self.life_exp_min
+        elif year_born > self.life_exp_max:
+            y = self.life_exp_max
+        else:
+            y = year_born
+        age = self.life_exp_arr[y - self.life_exp_min] + self.rng.randint(-10, 10)
         return year_born + max(0, age)
 
     def get_person(self, year_born, is_descendant, root_last_names, forced_last=None):
@@ -163,7 +253,7 @@ class PersonFactory:
         if forced_last is not None:
             last = forced_last
         elif is_descendant:
-            last = self.rng.choice(list(root_last_names))
+            last = root_last_names[0] if self.rng.random() < 0.5 else root_last_names[1]
         else:
             last = self.pick_last_name(year_born)
 
@@ -184,6 +274,17 @@ class FamilyTree:
         self.rng = random.Random(seed)
         self.factory = PersonFactory(self.rng)
         self.people = {}
+        # every person's full name, in creation order, for duplicate_names
+        self.full_names = []
+        # birth year -> number of people, kept up to date as people are added
+        self._year_counts = Counter()
+        # parent pid -> child pids while building; flattened once build() is done
+        self._child_buf = defaultdict(list)
+        # children_flat / children_span are only filled in after build() returns;
+        # until then the children live in _child_buf
+        self.children_flat = array.array("i")
+        # pid -> (offset, count) into children_flat
+        self.children_span = {}
         self.root_last_names = ("", "")
 
     def build(self):
@@ -201,37 +302,64 @@ class FamilyTree:
         p1.partner_id = p2.pid
         p2.partner_id = p1.pid
 
-        self.people[p1.pid] = p1
-        self.people[p2.pid] = p2
+        self._add_person(p1)
+        self._add_person(p2)
         self.root_last_names = (p1.last_name, p2.last_name)
 
         # BFS - use deque for O(1) popleft instead of O(n) pop(0)
-        visited_units = set()
         queue = deque([p1.pid, p2.pid])
 
+        # bind hot lookups to locals for the loop below
+        people = self.people
+        popleft = queue.popleft
+        enqueue = queue.append
+        add_person = self._add_person
+        maybe_add_partner = self._maybe_add_partner
+        make_children = self._make_children
+
         while queue:
-            pid = queue.popleft()
-            person = self.people[pid]
+            pid = popleft()
+            person = people[pid]
 
-            unit = self._unit_key(person)
-            if unit in visited_units:
+            # a couple is expanded once, whichever partner is dequeued first
+            if person.visited_unit:
                 continue
-            visited_units.add(unit)
-
-            self._maybe_add_partner(person)
-            for child in self._make_children(person):
-                self.people[child.pid] = child
-                queue.append(child.pid)
-
-    def _unit_key(self, person):
-        if person.partner_id is None:
-            return (person.pid, 0)
-        return tuple(sorted([person.pid, person.partner_id]))
+            person.visited_unit = True
+
+            maybe_add_partner(person)
+            if person.partner_id is not None:
+                people[person.partner_id].visited_unit = True
+            for child in make_children(person):
+                add_person(child)
+                enqueue(child.pid)
+
+        self._flatten_children()
+
+    def _flatten_children(self):
+        # pack every child list into one int array so people don't each hold a list
+        flat = array.array("i")
+        span = {}
+        for pid, kids in self._child_buf.items():
+            span[pid] = (len(flat), len(kids))
+            flat.extend(kids)
+        self.children_flat = flat
+        self.children_span = span
+        self._child_buf = defaultdict(list)
+
+    def _children_of(self, pid):
+        # only valid after build(); see children_flat / children_span
+        off, n = self.children_span.get(pid, (0, 0))
+        return self.children_flat[off:off + n]
+
+    def _add_person(self, person):
+        self.people[person.pid] = person
+        self.full_names.append(person.full_name)
+        self._year_counts[person.year_born] += 1
 
     def _maybe_add_partner(self, person):
         if person.partner_id is not None:
             return
-        _, marriage_rate = self.factory.birth_marriage[decade_str(person.year_born)]
+        _, marriage_rate = self.factory.rates_for_year(person.year_born)
         if self.rng.random() >= marriage_rate:
             return
 
@@ -240,15 +368,18 @@ class FamilyTree:
                                           root_last_names=self.root_last_names)
         partner.partner_id = person.pid
         person.partner_id = partner.pid
-        self.people[partner.pid] = partner
+        self._add_person(partner)
 
     def _make_children(self, person):
         parents = [person]
         if person.partner_id is not None:
             parents.append(self.people[person.partner_id])
 
-        elder = min(parents, key=lambda p: p.year_born)
-        birth_rate, _ = self.factory.birth_marriage[decade_str(elder.year_born)]
+        if len(parents) == 1 or parents[0].year_born <= parents[1].year_born:
+            elder = parents[0]
+        else:
+            elder = parents[1]
+        birth_rate, _ = self.factory.rates_for_year(elder.year_born)
 
         # +/- 1.5 around birth_rate, rounded up per assignment spec
         min_kids = max(0, math.ceil(birth_rate - 1.5))
@@ -261,14 +392,15 @@ class FamilyTree:
         if start_year > 2120:
             return []
 
+        # at most two parents, so skip the generator + any()
+        is_desc = parents[0].is_descendant or (len(parents) > 1 and parents[1].is_descendant)
         children = []
         for _ in range(n_kids):
             yb = self.rng.randint(start_year, end_year)
-            is_desc = any(p.is_descendant for p in parents)
             child = self.factory.get_person(yb, is_descendant=is_desc,
                                             root_last_names=self.root_last_names)
             for parent in parents:
-                parent.children_ids.append(child.pid)
+                self._child_buf[parent.pid].append(child.pid)
             children.append(child)
 
         return children
@@ -277,15 +409,16 @@ class FamilyTree:
         return len(self.people)
 
     def total_by_decade(self):
-        counts = Counter(decade_str(p.year_born) for p in self.people.values())
+        counts = Counter()
+        for year, n in self._year_counts.items():
+            counts[decade_str(year)] += n
         return sorted(counts.items(), key=lambda x: int(x[0][:4]))
 
     def total_by_year(self):
-        counts = Counter(p.year_born for p in self.people.values())
-        return sorted(counts.items())
+        return sorted(self._year_counts.items())
 
     def duplicate_names(self):
-        counts = Counter(p.full_name for p in self.people.values())
+        counts = Counter(self.full_names)
         return sorted([name for name, c in counts.items() if c > 1])
 
     def run(self):